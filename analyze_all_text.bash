@@ -34,17 +34,11 @@ echo ""
 echo "📊 STEP 1: Converting .txt files to CSV format..."
 echo ""
 
-txt_count=0
-for txt_file in transcriptions/*.txt; do
-    if python3 create_list.py "$txt_file"; then
-        ((txt_count++))
-        echo "🎯 Selected file: $txt_file"
-        echo "✅ Successfully converted: $txt_file"
-        echo "---"
-    else
-        echo "❌ Failed to convert: $(basename "$txt_file")"
-    fi
-done
+# create_list.py converts the files in parallel, tries every one of them
+# and reports each file as converted or failed
+if ! python3 create_list.py transcriptions/*.txt; then
+    echo "❌ Some .txt files in transcriptions/ could not be converted"
+fi
 
 echo ""
 echo "🔍 STEP 2: Running morphological analysis on CSV files..."
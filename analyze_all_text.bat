@@ -44,22 +44,13 @@ echo.
 echo 📊 STEP 1: Converting .txt files to CSV format...
 echo.
 
-set "txt_count=0"
-for %%f in ("transcriptions\*.txt") do (
-    echo 🎯 Selected file: %%f
-    
-    REM Run create_list.py on each .txt file
-    python "create_list.py" "%%f"
-    
-    REM Check if conversion was successful
-    if !errorlevel! equ 0 (
-        echo ✅ Successfully converted: %%f
-        set /a "txt_count+=1"
-    ) else (
-        echo ❌ Failed to convert: %%~nxf
-    )
-    
-    echo ---
+REM Run create_list.py once on all .txt files so they are converted in parallel;
+REM it tries every file and reports each one as converted or failed
+python "create_list.py" "transcriptions\*.txt"
+
+REM Check if every conversion was successful
+if !errorlevel! neq 0 (
+    echo ❌ Some .txt files in transcriptions/ could not be converted
 )
 
 REM Step 2: Analyze all CSV files using morphological_analyzer.py
@@ -68,13 +68,8 @@ if [ -z "$selected_file" ]; then
 fi
 
 echo ""
-echo "🎯 Selected file: $selected_filename"
-echo "--------------------------------------------------"
-
-if python3 create_list.py "$selected_file"; then
-    echo "✅ Successfully converted: $selected_filename"
-else
-    echo "❌ Failed to convert: $selected_filename"
+# create_list.py reports the file as converted or failed
+if ! python3 create_list.py "$selected_file"; then
     exit 1
 fi
 
@@ -73,18 +73,13 @@ if not defined selected_file (
 )
 
 echo.
-echo 🎯 Selected file: !selected_filename!
-echo --------------------------------------------------
-
 REM Step 1: Convert selected .txt file to CSV
-REM Run create_list.py on the selected .txt file
+REM Run create_list.py on the selected .txt file, which reports it as
+REM converted or failed
 python "create_list.py" "!selected_file!"
 
-REM Check if conversion was successful
-if !errorlevel! equ 0 (
-    echo ✅ Successfully converted: !selected_filename!
-) else (
-    echo ❌ Failed to convert: !selected_filename!
+REM Stop if the conversion failed
+if !errorlevel! neq 0 (
     pause
     exit /b 1
 )
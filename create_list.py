@@ -1,124 +1,142 @@
 ﻿import sys
 import os
-
-# Get input file from command line argument (required)
-if len(sys.argv) > 1:
-    input_file = sys.argv[1]
-else:
-    print("❌ ERROR: No input file specified!")
-    print("💡 USAGE: python3 create_list.py filename.txt")
-    print("💡 EXAMPLE: python3 create_list.py QAZ19th-text05-transcription.txt")
-    sys.exit(1)
-
-# accesses the .txt file in current directory
-with open(input_file, encoding="utf-8-sig") as txt_file:
-   output = txt_file.read()
-
-# converts .txt file input into a list
-list = output.split()
-
-# keeps track of the line we are on in the text
-current_line = 1  # Start with line 1 instead of None
-
-# {word : number of occurrences, [lines of occurrence]}
-dictionary = {}
-
-# function to remove most punctuation from the word
-def remove_punctuation(word):
-   cleaned_word = word
+import re
+import csv
+import glob
+import mmap
+import multiprocessing
+from collections import Counter
+
+# punctuation stripped from every word: quotation marks, periods, commas,
+# colons, semicolons, question marks and ellipses (add more here if needed)
+_PUNCTUATION = ".,:;?\u201C\u201D\u2026"
+
+# matches a line number marker such as (12) or (12). only when it stands on
+# its own between whitespace, so brackets inside words are never taken for a line
+_LINE_RE = re.compile(
+   r"(?<!\S)\((\d+)\)(?=[" + re.escape(_PUNCTUATION) + r"]*(?:\s|$))"
+)
+
+# files at least this large are memory-mapped instead of read into a buffer
+_MMAP_THRESHOLD = 8 << 20
+
+# function to read a .txt file, memory-mapping large files so the pages are
+# decoded straight from the OS cache without an extra copy of the bytes
+def read_text(input_file):
+   if os.path.getsize(input_file) < _MMAP_THRESHOLD:
+      with open(input_file, encoding="utf-8-sig") as txt_file:
+         return txt_file.read()
+   with open(input_file, "rb") as txt_file:
+      with mmap.mmap(txt_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+         return str(mapped, "utf-8-sig")
+
+# function to build the translation table for a text, deleting every digit
+# (any character str.isdigit() accepts, footnote superscripts included) and
+# the punctuation above; only the characters of the text itself are checked
+def clean_table(text):
+   return dict.fromkeys(ord(char) for char in set(text)
+                        if char.isdigit() or char in _PUNCTUATION)
+
+# function to remove numbers and most punctuation from the text with the table
+# above and convert the letters to lowercase
+def clean_text(text, table):
+   return text.translate(table).lower()
+
+# function to yield (line number, text) segments split at every line marker,
+# one at a time so only the current segment is copied out of the text
+def split_lines(text):
+   # Start with line 1 for any text before the first marker
+   current_line = 1
+   start = 0
+   for match in _LINE_RE.finditer(text):
+      yield current_line, text[start:match.start()]
+      current_line = int(match.group(1))
+      start = match.end()
+   yield current_line, text[start:]
+
+# function to count the words of one .txt file and write its table
+def process_file(input_file):
+   # accesses the .txt file in current directory
+   output = read_text(input_file)
+   # the digits and punctuation to delete, found in one pass over the text
+   table = clean_table(output)
+
+   # {word : number of occurrences}
+   counts = Counter()
+   # {word : {lines of occurrence}}
+   lines_per_word = {}
+
+   # traverses through the text one line segment at a time
+   for current_line, segment in split_lines(output):
+      # numbers and punctuation are removed from the whole segment at once, so
+      # standalone numbers and ellipses are left empty and dropped by split()
+      words = clean_text(segment, table).split()
+      counts.update(words)
+      for word in set(words):
+         # most words have been seen before, so only new words pay for the
+         # KeyError and get a fresh set of lines
+         try:
+            lines_per_word[word].add(current_line)
+         except KeyError:
+            lines_per_word[word] = {current_line}
+
+   # writes the counts to a csv file, every word has its own line
+   # Remove .txt extension and path before adding -table.csv
+   base_name = os.path.basename(input_file).replace('.txt', '')
+   output_file = "transcription_tables/" + base_name + "-table.csv"
+   # a failed write is left to convert_file, which reports it with the file
+   with open(output_file, "w", newline="", buffering=1 << 20) as file:
+      writer = csv.writer(file, lineterminator="\n")
+      writer.writerow(("word", "number of occurrences", "lines"))
+      # every row will be written as
+         # {word, number of occurrences, [line numbers]}
+         # with comma-separated line numbers, quoted by the csv module
+      writer.writerows(
+         (word, count, "[" + ", ".join(map(str, sorted(lines_per_word[word]))) + "]")
+         for word, count in counts.items()
+      )
+
+# function to convert one .txt file, returning the error message instead of
+# raising so that one bad file does not stop the others
+def convert_file(input_file):
    try:
-      # removes ASCII quotation marks
-      if "\u201C" in word:
-         remove_left_quote = cleaned_word.replace("\u201C", "")
-         cleaned_word = remove_left_quote
-      if "\u201D" in word:
-         remove_right_quote = cleaned_word.replace("\u201D", "")
-         cleaned_word = remove_right_quote
-
-      # removes periods
-      if "." in word:
-         remove_period = cleaned_word.replace(".", "")
-         cleaned_word = remove_period
-
-      # removes commas
-      if "," in word:
-         remove_comma = cleaned_word.replace(",", "")
-         cleaned_word = remove_comma
-
-      # removes colons
-      if ":" in word:
-         remove_colon = cleaned_word.replace(":", "")
-         cleaned_word = remove_colon
-
-      # removes semicolons
-      if ";" in word:
-         remove_semicolon = cleaned_word.replace(";", "")
-         cleaned_word = remove_semicolon
-
-      # removes question mark
-      if "?" in word:
-         remove_question = cleaned_word.replace("?", "")
-         cleaned_word = remove_question
-
-      # converts the letter to lowercase
-      return cleaned_word.lower()
-   
+      process_file(input_file)
    except Exception as e:
-      print(f"Unable to remove punctuation: {e}")
-
-# function to remove numbers from a word if hypenated with an actual word
-def remove_numbers(word):
-   cleaned_word = word
-   for char in cleaned_word:
-      if char.isdigit():
-         cleaned_word = cleaned_word.replace(char, "")
-   return cleaned_word
-   
-# traverses through list received from .txt file   
-for word in list:
-   # skips the "word" if it's a line number marker
-   if "(" and ")" in word:
-      remove_left_bracket = word.replace("(", "")
-      removed_brackets = remove_left_bracket.replace(")", "")
-      current_line = removed_brackets
-      continue
-
-   # skips the word if it is a number (not hyphenated) or ellipses
-   if word.isdigit() or word == "…" or word == "..." or word == "\u2026":
-      continue
-
-   # if the word starts with a number, remove said number
-   word = remove_numbers(word)
-
-   # removes punctuation before processing
-   word = remove_punctuation(word)
-
-   # checks the dictionary to see if the word already exists
-   if word in dictionary.keys():
-      # if it does, increase the word count and add the line where it occurs next
-      dictionary.get(word)[0] += 1
-      if current_line not in dictionary.get(word)[1]:
-         dictionary.get(word)[1].append(int(current_line))
-      # otherwise, add it to the dictionary as a new word occuring once on the current line
+      return f"{type(e).__name__}: {e}"
+   return None
+
+def main():
+   # Get input files from command line arguments (required)
+   if len(sys.argv) > 1:
+      # wildcards such as transcriptions\*.txt are expanded here because the
+      # Windows command prompt passes them through unexpanded, but paths that
+      # already exist are taken as they are
+      input_files = [path for arg in sys.argv[1:]
+                     for path in ([arg] if os.path.exists(arg) else sorted(glob.glob(arg)) or [arg])]
+   else:
+      print("❌ ERROR: No input file specified!")
+      print("💡 USAGE: python3 create_list.py filename.txt [more files...]")
+      print("💡 EXAMPLE: python3 create_list.py QAZ19th-text05-transcription.txt")
+      sys.exit(1)
+
+   if len(input_files) == 1:
+      errors = [convert_file(input_files[0])]
    else:
-      dictionary.update({word : [int(1), [int(current_line)]]})
-
-# writes the dictionary to a csv file, every word has its own line
-# Remove .txt extension and path before adding -table.csv
-base_name = os.path.basename(input_file).replace('.txt', '')
-output_file = "transcription_tables/" + base_name + "-table.csv"
-try:
-   with open(output_file, "w", newline="") as file:
-      # writing the header manually
-      file.write("word,number of occurrences,lines\n")  
-      for word in dictionary:
-         # Use simple commas to separate line numbers, enclosed in quotes
-         line_numbers = [str(line_num) for line_num in dictionary[word][1]]
-         comma_line_numbers = ', '.join(line_numbers)
-         line = f"{word},{dictionary[word][0]},\"[{comma_line_numbers}]\"\n"
-         # line will be written as 
-            # {word, number of occurrences, [line numbers]} 
-            # with comma-separated line numbers
-         file.write(line)
-except Exception as e:
-        print(f"Unable to output table: {e}")
\ No newline at end of file
+      # every file writes its own table, so the files are split across processes
+      with multiprocessing.Pool(min(len(input_files), os.cpu_count() or 1)) as pool:
+         errors = pool.map(convert_file, input_files, chunksize=1)
+
+   # reports every file once all of them have been tried
+   for input_file, error in zip(input_files, errors):
+      print(f"🎯 Selected file: {input_file}")
+      if error is None:
+         print(f"✅ Successfully converted: {input_file}")
+      else:
+         print(f"❌ Failed to convert: {os.path.basename(input_file)} ({error})")
+      print("---")
+
+   if any(errors):
+      sys.exit(1)
+
+if __name__ == "__main__":
+   main()
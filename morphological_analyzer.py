@@ -4,8 +4,19 @@ import csv
 import re
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Optional
 
+# Optional segments written in brackets, e.g. the [y] in 'da[y]n'
+_BRACKET_RE = re.compile(r'\[[^\]]*\]')
+
+# Shared result for a strategy that found nothing; callers only read its
+# 'root', so it must never be modified
+_MISS = {'root': ''}
+
+# Vowels that make a candidate string plausible as a root
+_VOWELS = frozenset('aeiouäëïöüāēīōū')
+
 class MorphologicalAnalyzer:
     
     def __init__(self):
@@ -117,11 +128,77 @@ class MorphologicalAnalyzer:
         self.all_affixes = []
         for category, affix_list in self.affixes.items():
             for affix in affix_list:
-                clean_affix = re.sub(r'\[[^\]]*\]', '', affix)
+                clean_affix = _BRACKET_RE.sub('', affix) if '[' in affix else affix
                 if clean_affix:
                     self.all_affixes.append((clean_affix, category))
         self.all_affixes.sort(key=lambda x: len(x[0]), reverse=True)
         
+        # Many affix strings belong to several categories (e.g. 'ï'), so each
+        # distinct string maps to its categories in all_affixes order
+        self._affix_to_cats = {}
+        for affix, category in self.all_affixes:
+            self._affix_to_cats.setdefault(affix, []).append(category)
+        
+        # Trie over the reversed affixes: walking a word from its last letter
+        # only visits the affixes that actually end it. The categories of the
+        # affix ending at a node are stored under the None key, each with the
+        # part of its score that does not depend on the root.
+        self._suffix_trie = {}
+        for affix, categories in self._affix_to_cats.items():
+            node = self._suffix_trie
+            for char in reversed(affix):
+                node = node.setdefault(char, {})
+            node[None] = [(category, self._affix_score(affix, category)) for category in categories]
+        
+        # Common suffix combinations in order - expanded from chagatai_og.lexc patterns
+        self.suffix_combinations = [
+            # 3POSS + LOC + ADJ (like -sin-de-gi)
+            ('sin', '3POSS'), ('de', 'LOC'), ('gi', 'ADJ'),
+            # 3POSS + LOC
+            ('sin', '3POSS'), ('de', 'LOC'),
+            # 1SG + LOC
+            ('ïm', '1SG'), ('da', 'LOC'),
+            # 1PL + LOC
+            ('mïz', '1PL'), ('da', 'LOC'),
+            # 2SG.POL + LOC
+            ('ïŋïz', '2SG.POL'), ('da', 'LOC'),
+            # GEN + 1SG
+            ('niŋ', 'GEN'), ('ïm', '1SG'),
+            # CV + LOC
+            ('ip', 'CV'), ('da', 'LOC'),
+            # PTCP + LOC
+            ('ġan', 'PTCP'), ('da', 'LOC'),
+            # Additional common patterns from LexC
+            ('mïz', '1PL'), ('da', 'LOC'),
+            ('ïm', '1SG'), ('da', 'LOC'),
+            ('ïŋïz', '2SG.POL'), ('da', 'LOC'),
+            ('niŋ', 'GEN'), ('ïm', '1SG'),
+            ('ip', 'CV'), ('da', 'LOC'),
+            ('ġan', 'PTCP'), ('da', 'LOC'),
+            # Verb + Person patterns
+            ('a', 'CV'), ('mïz', '1PL'),
+            ('a', 'CV'), ('ïm', '1SG'),
+            ('a', 'CV'), ('ïŋïz', '2SG.POL'),
+            # Noun + Possessive + Case patterns
+            ('ïm', '1SG'), ('niŋ', 'GEN'),
+            ('ïm', '1SG'), ('da', 'LOC'),
+            ('ïm', '1SG'), ('nï', 'ACC'),
+        ]
+        
+        # Every run of two or more consecutive suffix combinations is a pattern,
+        # tried in (start, end) order. Patterns are indexed by their joined text
+        # with their position in that order; a text seen earlier always matches
+        # first, so repeats are skipped. Patterns are kept as tuples and copied
+        # into each result, so changing a result cannot change the table.
+        self._pattern_index = {}
+        for i in range(len(self.suffix_combinations) - 1):
+            for j in range(i + 1, len(self.suffix_combinations)):
+                pattern = tuple(self.suffix_combinations[i:j+1])
+                pattern_text = ''.join(affix for affix, _ in pattern)
+                if pattern_text not in self._pattern_index:
+                    self._pattern_index[pattern_text] = (len(self._pattern_index), pattern)
+        self._pattern_lengths = sorted({len(text) for text in self._pattern_index})
+        
         # Loanword patterns for identification - comprehensive coverage from chagatai.foma
         self.loanword_patterns = {
             'persian_arabic': [r'[āēīōū]', r'[ṣṭḥġ]', r'[ī]', r'[ā]', r'[ē]', r'[ō]'],
@@ -130,19 +207,51 @@ class MorphologicalAnalyzer:
             'turkic_special': [r'[ï]', r'[ö]', r'[ü]', r'[ä]', r'[ë]', r'[ŋ]']
         }
         
+        # Most loanword patterns are single character classes like r'[āēīōū]',
+        # which are checked as a set of characters instead of running the regex.
+        # Any other patterns of a language are compiled once into one alternation.
+        self._loan_sets = {}
+        self._loan_regexes = {}
+        for lang, patterns in self.loanword_patterns.items():
+            chars = set()
+            regexes = []
+            for pattern in patterns:
+                if re.fullmatch(r'\[[^\]\\^-]+\]', pattern):
+                    chars.update(pattern[1:-1])
+                else:
+                    regexes.append(pattern)
+            self._loan_sets[lang] = frozenset(chars)
+            self._loan_regexes[lang] = re.compile('|'.join(regexes)) if regexes else None
+        
         # Short words and postpositions that need special handling, add more if needed
-        self.short_words = {
+        self.short_words = frozenset({
             'ma', 'da', 'dä', 'gä', 'on', 'bn', 'ham', 'petr', 'jep', 'jay',
             'tili', 'uruw', 'yenä', 'mudan', 'bergi', 'nïŋ', 'munïŋ', 'men',
             'qay', 'siz', 'gän', 'ŋïz', 'yüz', 'bul', 'söz', 'biz', 'dal', 'yïl', 'yaz'
+        })
+        
+        # Notes for the short words of up to three letters, and for other one
+        # and two letter words
+        self._short_word_notes = {
+            word: 'identified as short word/postposition'
+            for word in self.short_words if len(word) <= 3
         }
+        self._short_length_notes = {
+            1: 'single character word - likely valid',
+            2: 'two character word - likely valid'
+        }
+        
+        # Analyses per lowercased word: corpora repeat the same word forms often
+        self._analysis_cache = {}
 
     def is_loanword(self, word: str) -> Optional[str]:
         """Check if word is likely a loanword"""
-        for lang, patterns in self.loanword_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, word):
-                    return lang
+        for lang, chars in self._loan_sets.items():
+            if not chars.isdisjoint(word):
+                return lang
+            regex = self._loan_regexes[lang]
+            if regex and regex.search(word):
+                return lang
         return None
 
     def analyze_word(self, word: str) -> Dict[str, any]:
@@ -153,13 +262,28 @@ class MorphologicalAnalyzer:
         if word.endswith('-'):
             return self._analyze_trailing_hyphen(word)
         
+        # Strategies 2 and 3 only depend on the lowercased word, so their result
+        # is cached and copied for every occurrence with its original spelling.
+        # The lists are copied too, so changing a result cannot change the cache.
+        analysis = self._analysis_cache.get(word)
+        if analysis is None:
+            analysis = self._analysis_cache[word] = self._analyze_core(word)
+        result = {key: list(value) if isinstance(value, list) else value
+                  for key, value in analysis.items()}
+        result['word'] = original_word
+        return result
+
+    def _analyze_core(self, word: str) -> Dict[str, any]:
+        """Run the morphological and loanword strategies on a lowercased word"""
         # Strategy 2: Try morphological analysis FIRST (this is the key change!)
         best_analysis = None
         
-        # Approach 2a: Proper morpheme boundary detection
-        analysis1 = self._analyze_from_end(word)
-        if analysis1['root']:
-            best_analysis = analysis1
+        # Approach 2a: Proper morpheme boundary detection, skipped for words of
+        # one or two letters, which leave no room for a two letter root and an affix
+        if len(word) > 2:
+            analysis1 = self._analyze_from_end(word)
+            if analysis1['root']:
+                best_analysis = analysis1
         
         # Approach 2b: Short word recognition
         if not best_analysis or not best_analysis['root']:
@@ -178,7 +302,6 @@ class MorphologicalAnalyzer:
             loanword_type = self.is_loanword(word)
             if loanword_type:
                 return {
-                    'word': original_word,
                     'root': word,
                     'affixes': [],
                     'segmentation': [word],
@@ -186,12 +309,10 @@ class MorphologicalAnalyzer:
                 }
         
         if best_analysis:
-            best_analysis['word'] = original_word
             return best_analysis
         
         # Fallback: Mark as unrecognized for separate processing
         return {
-            'word': original_word,
             'root': '',
             'affixes': [],
             'segmentation': [],
@@ -210,56 +331,41 @@ class MorphologicalAnalyzer:
                 'segmentation': [base_word],
                 'notes': ['word with trailing hyphen, base form preserved']
             }
-        return {'root': ''}
+        return _MISS
 
     def _analyze_short_word(self, word: str) -> Dict[str, any]:
         """Handle very short words and postpositions"""
-        if len(word) <= 3:
-            if word in self.short_words:
-                return {
-                    'root': word,
-                    'affixes': [],
-                    'segmentation': [word],
-                    'notes': ['identified as short word/postposition']
-                }
-            elif len(word) == 1:
-                return {
-                    'root': word,
-                    'affixes': [],
-                    'segmentation': [word],
-                    'notes': ['single character word - likely valid']
-                }
-            elif len(word) == 2:
-                return {
-                    'root': word,
-                    'affixes': [],
-                    'segmentation': [word],
-                    'notes': ['two character word - likely valid']
-                }
-        return {'root': ''}
+        note = self._short_word_notes.get(word) or self._short_length_notes.get(len(word))
+        if note:
+            return {
+                'root': word,
+                'affixes': [],
+                'segmentation': [word],
+                'notes': [note]
+            }
+        return _MISS
 
     def _analyze_super_aggressive(self, word: str) -> Dict[str, any]:
         if len(word) > 3:
+            # Find the vowels once: both parts of a split are at least two
+            # letters, so a part looks like a root exactly when it holds a vowel
+            vowel_positions = [i for i, char in enumerate(word) if char in _VOWELS]
+            if not vowel_positions:
+                return _MISS
+            first_vowel = vowel_positions[0]
+            last_vowel = vowel_positions[-1]
+            
             for i in range(2, len(word) - 1):
-                part1 = word[:i]
-                part2 = word[i:]
-                
-                if self._looks_like_root(part1) or self._looks_like_root(part2):
+                if first_vowel < i or last_vowel >= i:
+                    part1 = word[:i]
+                    part2 = word[i:]
                     return {
                         'root': f"{part1}-{part2}",
                         'affixes': [],
                         'segmentation': [part1, part2],
                         'notes': ['aggressive analysis - split word into parts']
                     }
-        return {'root': ''}
-
-    def _looks_like_root(self, candidate: str) -> bool:
-        """Quick check if string could be a root"""
-        if len(candidate) < 2:
-            return False
-        vowels = 'aeiouäëïöüāēīōū'
-        has_vowel = any(v in candidate for v in vowels)
-        return has_vowel
+        return _MISS
 
     def _analyze_from_end(self, word: str) -> Dict[str, any]:
         """Proper morpheme boundary detection that maintains word order"""
@@ -273,111 +379,98 @@ class MorphologicalAnalyzer:
     
     def _analyze_by_patterns(self, word: str) -> Dict[str, any]:
         """Analyze using common Turkic morpheme patterns"""
-        # Common suffix combinations in order - expanded from chagatai_og.lexc patterns
-        suffix_combinations = [
-            # 3POSS + LOC + ADJ (like -sin-de-gi)
-            ('sin', '3POSS'), ('de', 'LOC'), ('gi', 'ADJ'),
-            # 3POSS + LOC
-            ('sin', '3POSS'), ('de', 'LOC'),
-            # 1SG + LOC
-            ('ïm', '1SG'), ('da', 'LOC'),
-            # 1PL + LOC
-            ('mïz', '1PL'), ('da', 'LOC'),
-            # 2SG.POL + LOC
-            ('ïŋïz', '2SG.POL'), ('da', 'LOC'),
-            # GEN + 1SG
-            ('niŋ', 'GEN'), ('ïm', '1SG'),
-            # CV + LOC
-            ('ip', 'CV'), ('da', 'LOC'),
-            # PTCP + LOC
-            ('ġan', 'PTCP'), ('da', 'LOC'),
-            # Additional common patterns from LexC
-            ('mïz', '1PL'), ('da', 'LOC'),
-            ('ïm', '1SG'), ('da', 'LOC'),
-            ('ïŋïz', '2SG.POL'), ('da', 'LOC'),
-            ('niŋ', 'GEN'), ('ïm', '1SG'),
-            ('ip', 'CV'), ('da', 'LOC'),
-            ('ġan', 'PTCP'), ('da', 'LOC'),
-            # Verb + Person patterns
-            ('a', 'CV'), ('mïz', '1PL'),
-            ('a', 'CV'), ('ïm', '1SG'),
-            ('a', 'CV'), ('ïŋïz', '2SG.POL'),
-            # Noun + Possessive + Case patterns
-            ('ïm', '1SG'), ('niŋ', 'GEN'),
-            ('ïm', '1SG'), ('da', 'LOC'),
-            ('ïm', '1SG'), ('nï', 'ACC'),
-        ]
-        
-        # Try to find these patterns in the word
-        for i in range(len(suffix_combinations) - 1):
-            for j in range(i + 1, len(suffix_combinations)):
-                pattern = suffix_combinations[i:j+1]
-                if self._matches_pattern(word, pattern):
-                    return self._apply_pattern(word, pattern)
-        
-        return {'root': ''}
-    
-    def _matches_pattern(self, word: str, pattern: List[tuple]) -> bool:
-        """Check if word ends with the given suffix pattern"""
-        pattern_text = ''.join(affix for affix, _ in pattern)
-        return word.endswith(pattern_text)
+        # Look up each ending of the word that is as long as some pattern, and
+        # keep the earliest pattern in order among those found
+        best_text = None
+        best_order = None
+        for length in self._pattern_lengths:
+            if length > len(word):
+                break
+            entry = self._pattern_index.get(word[-length:])
+            if entry is not None and (best_order is None or entry[0] < best_order):
+                best_text = word[-length:]
+                best_order = entry[0]
+        
+        if best_text is None:
+            return _MISS
+        return self._apply_pattern(word, best_text, self._pattern_index[best_text][1])
     
-    def _apply_pattern(self, word: str, pattern: List[tuple]) -> Dict[str, any]:
-        """Apply the matched pattern to get analysis"""
-        pattern_text = ''.join(affix for affix, _ in pattern)
+    def _apply_pattern(self, word: str, pattern_text: str, pattern: tuple) -> Dict[str, any]:
+        """Apply the matched pattern, whose joined affixes are pattern_text, to get analysis"""
         root = word[:-len(pattern_text)]
         
         if len(root) >= 2:  # Ensure root is reasonable length
             return {
                 'root': root,
-                'affixes': pattern,
+                'affixes': list(pattern),
                 'segmentation': [root] + [affix for affix, _ in pattern],
                 'notes': ['Turkic morpheme pattern matching']
             }
-        return {'root': ''}
+        return _MISS
 
     def _improved_suffix_stripping(self, word: str) -> Dict[str, any]:
         """Improved suffix stripping that respects morpheme boundaries"""
-        # Sort affixes by length (longest first) to avoid over-segmentation
-        sorted_affixes = sorted(self.all_affixes, key=lambda x: len(x[0]), reverse=True)
-        
-        # Try to find the best segmentation
-        best_analysis = None
+        # Walk the word backwards through the suffix trie to collect the affixes
+        # it ends with, keeping a root of at least two letters
+        matches = []
+        node = self._suffix_trie
+        for i in range(len(word) - 1, 1, -1):
+            node = node.get(word[i])
+            if node is None:
+                break
+            if None in node:
+                matches.append((i, node[None]))
+        
+        # Try to find the best segmentation, remembering only where it splits
+        best_split = None
+        best_category = None
         best_score = 0
         
-        for affix, category in sorted_affixes:
-            if word.endswith(affix) and len(word) > len(affix) + 1:
-                potential_root = word[:-len(affix)]
-                
-                # Score based on root quality and affix length
-                score = self._score_analysis(potential_root, affix, category)
+        # Longest affixes first to avoid over-segmentation
+        for i, scored_categories in reversed(matches):
+            # Score based on root quality and affix length
+            root_score = self._root_score(word[:i])
+            for category, affix_score in scored_categories:
+                score = root_score + affix_score
                 
                 if score > best_score:
                     best_score = score
-                    best_analysis = {
-                        'root': potential_root,
-                        'affixes': [(affix, category)],
-                        'segmentation': [potential_root, affix],
-                        'notes': ['individual suffix analysis']
-                    }
+                    best_split = i
+                    best_category = category
         
-        return best_analysis if best_analysis else {'root': ''}
+        if best_split is None:
+            return _MISS
+        
+        root = word[:best_split]
+        affix = word[best_split:]
+        return {
+            'root': root,
+            'affixes': [(affix, best_category)],
+            'segmentation': [root, affix],
+            'notes': ['individual suffix analysis']
+        }
     
-    def _score_analysis(self, root: str, affix: str, category: str) -> float:
-        """Score a potential analysis based on linguistic plausibility"""
+    def _root_score(self, root: str) -> float:
+        """Score how plausible a potential root is"""
         score = 0.0
+        root_length = len(root)
         
         # Root quality
-        if len(root) >= 2:
+        if root_length >= 2:
             score += 1.0
-        if len(root) >= 3:
+        if root_length >= 3:
             score += 0.5
         
         # Check if root has vowels
-        vowels = 'aeiouäëïöüāēīōū'
-        if any(v in root for v in vowels):
+        if not _VOWELS.isdisjoint(root):
             score += 1.0
         
+        return score
+    
+    def _affix_score(self, affix: str, category: str) -> float:
+        """Score how plausible an affix and its category are"""
+        score = 0.0
+        
         # Affix quality
         if len(affix) >= 2:
             score += 0.5
@@ -389,49 +482,85 @@ class MorphologicalAnalyzer:
         
         return score
 
+# Below this many words, starting worker processes costs more than it saves
+_PARALLEL_MIN_WORDS = 5000
+
+# Analyzer of the current worker process, created once by _init_worker
+_worker_analyzer = None
+
+def _init_worker(analyzer_class):
+    """Create the analyzer used by this worker process"""
+    global _worker_analyzer
+    _worker_analyzer = analyzer_class()
+
+def _analyze_one(word: str) -> Dict[str, any]:
+    """Analyze one word with this worker process's analyzer"""
+    return _worker_analyzer.analyze_word(word)
+
 def analyze_csv_file(csv_file_path: str, analyzer_class) -> List[Dict[str, any]]:
     """Analyze all words from CSV file using specified analyzer"""
-    analyzer = analyzer_class()
     results = []
     try:
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
+        with open(csv_file_path, 'r', encoding='utf-8', newline='', buffering=1 << 20) as file:
+            reader = csv.reader(file)
+            
+            # Columns are resolved to positions once; a repeated name refers to
+            # its last column, as it would in a csv.DictReader
+            header = next(reader, [])
+            columns = {col: i for i, col in enumerate(header)}
             
             # Check if required columns exist
-            if 'word' not in reader.fieldnames:
+            if 'word' not in columns:
                 raise ValueError("CSV must contain a 'word' column")
+            word_idx = columns['word']
             
             # Try to find occurrence and line columns with flexible names
-            occurrence_col = None
-            line_col = None
+            occurrence_idx = None
+            line_idx = None
             
-            for col in reader.fieldnames:
+            for col, i in columns.items():
                 if 'occurrence' in col.lower() or 'count' in col.lower() or 'frequency' in col.lower():
-                    occurrence_col = col
+                    occurrence_idx = i
                 if 'line' in col.lower() or 'lines' in col.lower():
-                    line_col = col
+                    line_idx = i
             
+            words = []
+            row_details = []
             for row in reader:
-                word = row['word']
-                analysis = analyzer.analyze_word(word)
+                # Blank lines hold no row
+                if not row:
+                    continue
+                words.append(row[word_idx])
                 
                 # Add occurrences if column exists
-                if occurrence_col:
-                    analysis['occurrences'] = row[occurrence_col]
+                if occurrence_idx is not None:
+                    occurrences = row[occurrence_idx]
                 else:
-                    analysis['occurrences'] = '1'
+                    occurrences = '1'
                 
                 # Add lines if column exists
-                if line_col:
+                if line_idx is not None:
                     # Clean and format line numbers to avoid CSV parsing issues
-                    lines_str = row[line_col]
+                    lines_str = row[line_idx]
                     # Remove any problematic characters and ensure clean format
                     lines_str = lines_str.replace('\\', '').replace('"', '').strip()
-                    analysis['lines'] = lines_str
                 else:
-                    analysis['lines'] = '[1]'
-                    
-                results.append(analysis)
+                    lines_str = '[1]'
+                
+                row_details.append((occurrences, lines_str))
+        
+        # Large tables are analyzed across processes, each with its own analyzer
+        if len(words) >= _PARALLEL_MIN_WORDS and (os.cpu_count() or 1) > 1:
+            with ProcessPoolExecutor(initializer=_init_worker, initargs=(analyzer_class,)) as executor:
+                analyses = list(executor.map(_analyze_one, words, chunksize=1024))
+        else:
+            analyzer = analyzer_class()
+            analyses = [analyzer.analyze_word(word) for word in words]
+        
+        for analysis, (occurrences, lines_str) in zip(analyses, row_details):
+            analysis['occurrences'] = occurrences
+            analysis['lines'] = lines_str
+            results.append(analysis)
         
         return results
             
@@ -560,9 +689,11 @@ def main():
     output_file = f'../morphological_analysis/{input_name}-morphological-analysis.csv'
     with open(output_file, 'w', newline='', encoding='utf-8') as file:
         fieldnames = ['word', 'root + affixes', 'occurrences', 'lines', 'notes']
-        writer = csv.DictWriter(file, fieldnames=fieldnames, quoting=csv.QUOTE_MINIMAL)
-        writer.writeheader()
+        writer = csv.writer(file, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(fieldnames)
         
+        # Rows are built as tuples in fieldnames order and written in one batch
+        rows = []
         for result in recognized_results:
             # Create root + affixes column
             if result['affixes']:
@@ -573,13 +704,15 @@ def main():
             
             notes_str = '; '.join(result['notes'])
             
-            writer.writerow({
-                'word': result['word'],
-                'root + affixes': root_affixes,
-                'occurrences': result['occurrences'],
-                'lines': result['lines'],
-                'notes': notes_str    # <- if you want to know how the program approached the token
-            })
+            rows.append((
+                result['word'],
+                root_affixes,
+                result['occurrences'],
+                result['lines'],
+                notes_str    # <- if you want to know how the program approached the token
+            ))
+        
+        writer.writerows(rows)
     
     # Save unrecognized words to fallback CSV (similar to input format)
     if unrecognized_words > 0:
@@ -588,15 +721,12 @@ def main():
         
         with open(fallback_file, 'w', newline='', encoding='utf-8') as file:
             fieldnames = ['word', 'number of occurrences', 'lines']
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for result in unrecognized_results:
-                writer.writerow({
-                    'word': result['word'],
-                    'number of occurrences': result['occurrences'],
-                    'lines': result['lines']
-                })
+            writer = csv.writer(file)
+            writer.writerow(fieldnames)
+            writer.writerows(
+                (result['word'], result['occurrences'], result['lines'])
+                for result in unrecognized_results
+            )
         
         print(f"\nUnrecognized words saved to: {fallback_file}")
         print("These words need additional analysis or affix definitions.")